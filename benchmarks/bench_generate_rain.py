@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""Regression benchmarks for the frame loop against every release in `oldversions/`.
+
+Each version runs against the same seeded headless screen over a matrix of
+screen sizes and intensities. The current code is measured the way `main`
+runs it, through `RainSimulation.tick()` and `render_into()` with the ground
+enabled, in cell and braille modes; the old releases only have `generate_rain`
+and are there for comparison. Throughput (the median frames per CPU second of
+several runs) is compared with the baselines in `baseline.json`, and the run
+fails if the current code regressed by more than the threshold in any case and
+a second measurement of that case agrees. Baselines are machine specific, so
+record your own with `--update` before relying on the check.
+"""
+
+import argparse
+import curses
+import importlib.util
+import inspect
+import json
+import platform
+import gc
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import raintty  # noqa: E402
+
+BASELINE = Path(__file__).resolve().parent / 'baseline.json'
+SIZES = [(24, 80), (50, 200)]
+INTENSITIES = [0.1, 0.5, 1.0]
+WIND = 1
+SEED = 1234
+MIN_TIME = 0.5  # CPU seconds each timed run lasts at least, so small cases aren't dominated by noise
+
+
+class HeadlessCurses:
+    """Proxies the curses module for old releases, replacing calls that need a terminal."""
+
+    color_pair = staticmethod(raintty.color_pair)
+
+    def __getattr__(self, name):
+        return getattr(curses, name)
+
+
+def release(generate_rain):
+    """Returns a frame factory that drives an old release's `generate_rain` on a screen."""
+    takes_wind = len(inspect.signature(generate_rain).parameters) >= 5
+
+    def make_frame(screen, intensity):
+        raindrops, splashes = [], {}
+        args = (intensity, WIND) if takes_wind else (intensity,)
+
+        def frame():
+            nonlocal raindrops
+            raindrops = generate_rain(screen, raindrops, splashes, *args)
+        return frame
+    return make_frame
+
+
+def simulation(hires=None):
+    """Returns a frame factory that drives a `RainSimulation` the way `main` does."""
+    def make_frame(screen, intensity):
+        settings = raintty.Settings(intensity=intensity, wind=WIND, hires=hires)
+        rain = raintty.RainSimulation(settings, *screen.getmaxyx())
+
+        def frame():
+            rain.tick()
+            rain.render_into(screen)
+        return frame
+    return make_frame
+
+
+def load_versions():
+    """Returns (name, frame factory) for every old release and the current code."""
+    versions = []
+    for path in sorted((ROOT / 'oldversions').glob('raintty-*.py')):
+        spec = importlib.util.spec_from_file_location(path.stem.replace('-', '_').replace('.', '_'), path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        module.curses = HeadlessCurses()
+        versions.append((path.stem, release(module.generate_rain)))
+    versions.append(('current', simulation()))
+    versions.append(('current-hires', simulation('braille')))
+    return versions
+
+
+def run_case(make_frame, height, width, intensity, frames):
+    """Returns the frames per CPU second of one version on a seeded headless screen.
+
+    CPU time and a paused garbage collector keep other load on the machine and
+    collection timing out of the measurement.
+    """
+    random.seed(SEED)
+    frame = make_frame(raintty.HeadlessScreen(height, width), intensity)
+
+    for _ in range(height):  # Warm up until the screen is full of drops
+        frame()
+    timed = 0
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.process_time()
+        while timed < frames or time.process_time() - start < MIN_TIME:
+            frame()
+            timed += 1
+        elapsed = time.process_time() - start
+    finally:
+        gc.enable()
+    return timed / elapsed
+
+
+def run_matrix(frames, repeats):
+    """Benchmarks every version over the size and intensity matrix, keeping the median of `repeats`."""
+    results = {}
+    for name, make_frame in load_versions():
+        results[name] = {}
+        for height, width in SIZES:
+            for intensity in INTENSITIES:
+                case = f"{height}x{width}@{intensity}"
+                results[name][case] = statistics.median(
+                    run_case(make_frame, height, width, intensity, frames) for _ in range(repeats)
+                )
+    return results
+
+
+def report(results, baseline, threshold):
+    """Prints a table of results and returns the cases that regressed past `threshold`."""
+    cases = [f"{height}x{width}@{intensity}" for height, width in SIZES for intensity in INTENSITIES]
+    current = results['current']
+    print(f"{'version':<14}" + ''.join(f"{case:>16}" for case in cases))
+    for name, row in results.items():
+        print(f"{name:<14}" + ''.join(f"{row[case]:>12.0f} fps" for case in cases))
+    print(f"{'current vs':<14}")
+    for name, row in results.items():
+        if not name.startswith('current'):
+            print(f"{'  ' + name:<14}" + ''.join(f"{current[case] / row[case]:>15.2f}x" for case in cases))
+
+    # Old releases never change, so only the current code can regress
+    regressions = []
+    for name, row in results.items():
+        if not name.startswith('current'):
+            continue
+        for case, fps in row.items():
+            expected = baseline.get(name, {}).get(case)
+            if expected and fps < expected * (1 - threshold):
+                regressions.append((name, case, expected, fps))
+    return regressions
+
+
+def confirm(regressions, frames, repeats, threshold):
+    """Measures the regressed cases again and returns those still past `threshold`, so one noisy run can't fail."""
+    versions = dict(load_versions())
+    confirmed = []
+    for name, case, expected, _ in regressions:
+        size, intensity = case.split('@')
+        height, width = map(int, size.split('x'))
+        fps = statistics.median(
+            run_case(versions[name], height, width, float(intensity), frames) for _ in range(repeats)
+        )
+        if fps < expected * (1 - threshold):
+            confirmed.append((name, case, expected, fps))
+    return confirmed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the frame loop against the releases in oldversions/.")
+    parser.add_argument("--frames", type=int, default=100, help="Minimum frames timed per case (default: 100).")
+    parser.add_argument("--repeats", type=int, default=5, help="Runs per case; the median is kept (default: 5).")
+    parser.add_argument(
+        "--threshold", type=float, default=0.2,
+        help="Allowed throughput drop versus the baseline before failing (default: 0.2)."
+    )
+    parser.add_argument("--update", action="store_true", help="Record the results as the new baseline.")
+    args = parser.parse_args()
+
+    results = run_matrix(args.frames, args.repeats)
+    baseline = json.loads(BASELINE.read_text())['results'] if BASELINE.exists() else {}
+    regressions = report(results, baseline, args.threshold)
+    if regressions and not args.update:
+        regressions = confirm(regressions, args.frames, args.repeats, args.threshold)
+
+    if args.update:
+        BASELINE.write_text(json.dumps({
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'frames': args.frames,
+            'results': {name: {case: round(fps, 1) for case, fps in row.items()} for name, row in results.items()},
+        }, indent=2) + '\n')
+        print(f"Wrote {BASELINE}")
+    elif regressions:
+        for name, case, expected, fps in regressions:
+            print(f"REGRESSION {name} {case}: {fps:.0f} fps, baseline {expected:.0f} fps")
+        sys.exit(1)
+    elif not baseline:
+        print("No baseline recorded yet; run with --update.")
@@ -5,150 +5,1195 @@ import random
 import time
 import math
 import argparse
+import configparser
+import contextlib
+import cProfile
+import io
+import locale
+import os
+import pstats
+import select
+import shutil
+import sys
+import tracemalloc
+from array import array
+from itertools import compress
+from dataclasses import dataclass, field
 
+try:
+    import tomllib
+except ImportError:  # Python < 3.11 reads INI config files only
+    tomllib = None
 
-def generate_rain(stdscr, raindrops, splashes, intensity, wind):
-    """Updates raindrops, handles falling and wind logic, and creates splashes."""
-    height, width = stdscr.getmaxyx()
 
-    # Add new raindrops at the top
-    for x in range(width):
-        if random.random() < intensity:
-            raindrops.append((0, x))  # Add a new raindrop at the top row
+def color_pair(number):
+    """Returns the attribute for a color pair, falling back to a plain value without a terminal."""
+    try:
+        return curses.color_pair(number)
+    except curses.error:
+        return number << 8
+
+
+DEFAULT_PAIRS = {'rain': 1, 'splash': 2, 'lightning': 3, 'matrix': 4}  # Color pair number per color role
+
+
+class HeadlessScreen:
+    """Minimal in-memory stand-in for a curses window, for profiling and benchmarks."""
+
+    def __init__(self, height=24, width=80):
+        self.height = height
+        self.width = width
+        self.cells = [[' '] * width for _ in range(height)]
+
+    def getmaxyx(self):
+        return self.height, self.width
+
+    def addch(self, y, x, ch, attr=0):
+        if not (0 <= y < self.height and 0 <= x < self.width):
+            raise curses.error('addch() returned ERR')
+        self.cells[y][x] = ch
+
+    def addstr(self, y, x, text, attr=0):
+        for offset, ch in enumerate(text):
+            self.addch(y, x + offset, ch, attr)
+
+    def clear(self):
+        self.cells = [[' '] * self.width for _ in range(self.height)]
+
+    erase = clear
+
+    def getch(self):
+        return -1
+
+    def nodelay(self, flag):
+        pass
+
+    def refresh(self):
+        pass
+
+    def __str__(self):
+        return '\n'.join(''.join(row) for row in self.cells)
+
+
+class PhaseTimer:
+    """Accumulates time and the net change in traced memory per frame phase while profiling is on."""
+
+    def __init__(self):
+        self.enabled = False
+        self.totals = {}  # Phase name -> [calls, seconds, net bytes]
+        self.snapshot = None
+
+    def __call__(self, name):
+        return self._measure(name) if self.enabled else _NO_PHASE
+
+    @contextlib.contextmanager
+    def _measure(self, name):
+        tracing = tracemalloc.is_tracing()
+        before = tracemalloc.get_traced_memory()[0] if tracing else 0
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            retained = tracemalloc.get_traced_memory()[0] - before if tracing else 0
+            total = self.totals.setdefault(name, [0, 0.0, 0])
+            total[0] += 1
+            total[1] += elapsed
+            total[2] += retained
+
+    def capture(self):
+        """Snapshots traced allocations while the frame loop's objects are still alive."""
+        if self.enabled and tracemalloc.is_tracing():
+            self.snapshot = tracemalloc.take_snapshot()
+
+    def report(self):
+        """Formats the per-phase totals as a table."""
+        lines = [f"{'Phase':<16}{'calls':>8}{'total ms':>12}{'per call us':>14}{'net KiB':>12}"]
+        for name, (calls, seconds, retained) in sorted(self.totals.items(), key=lambda item: -item[1][1]):
+            lines.append(f"{name:<16}{calls:>8}{seconds * 1e3:>12.2f}{seconds * 1e6 / calls:>14.1f}"
+                         f"{retained / 1024:>12.1f}")
+        return '\n'.join(lines)
+
+
+_NO_PHASE = contextlib.nullcontext()
+PHASES = PhaseTimer()
+
+
+FIXED_SHIFT = 8  # Fractional bits of fixed-point row positions and speeds
+FIXED_ONE = 1 << FIXED_SHIFT
+
+
+class ParticleStore:
+    """Compact parallel arrays holding every live particle.
+
+    `ys` and `xs` are the cell a particle is drawn in. `fys` is its row as a
+    fixed-point integer (`FIXED_ONE` per row), `vys` its downward speed in
+    fixed-point rows per frame and `vts` the terminal speed it accelerates to.
+    """
 
-    # Process existing raindrops
-    new_raindrops = []
-    for y, x in raindrops:
-        x = (x + wind) % width  # Apply wind to horizontal movement
+    __slots__ = ('ys', 'xs', 'fys', 'vys', 'vts')
 
-        if y + 1 >= height:
-            continue  # Prevent going out of bounds
+    def __init__(self, ys=(), xs=(), fys=None, vys=None, vts=None):
+        self.ys = array('i', ys)
+        self.xs = array('i', xs)
+        self.fys = array('i', [y << FIXED_SHIFT for y in self.ys] if fys is None else fys)
+        self.vys = array('i', [FIXED_ONE] * len(self.ys) if vys is None else vys)
+        self.vts = array('i', self.vys if vts is None else vts)
 
-        if y + 1 == height - 1:  # If raindrop hits the bottom
-            splashes[x] = time.time()  # Add a splash
-            if 0 <= y < height and 0 <= x < width:
-                stdscr.addch(y, x, ' ')
+    def __len__(self):
+        return len(self.ys)
+
+    def __iter__(self):
+        return zip(self.ys, self.xs)
+
+    def spawn_row(self, y, xs, speed=FIXED_ONE, terminal=None):
+        """Adds one particle on row `y` for every column in `xs`, moving at fixed-point `speed`."""
+        count = len(xs)
+        self.ys.extend([y] * count)
+        self.xs.extend(xs)
+        self.fys.extend([y << FIXED_SHIFT] * count)
+        self.vys.extend([speed] * count)
+        self.vts.extend([speed] * count if terminal is None else terminal)
+
+    def replace(self, ys, xs, fys, vys, dropped=()):
+        """Swaps in the arrays produced by a batch update, then removes the particles at `dropped` indices.
+
+        A handful of landings are cheapest to delete in place. Dense sub-cell rain
+        lands hundreds at once, where each O(n) delete adds up, so those are filtered out instead.
+        """
+        if len(dropped) > 32:
+            keep = bytearray(b'\x01') * len(ys)
+            for i in dropped:
+                keep[i] = 0
+            ys, xs, fys, vys, vts = (compress(column, keep) for column in (ys, xs, fys, vys, self.vts))
+            self.vts = array('i', vts)
+            dropped = ()
+        self.ys = array('i', ys)
+        self.xs = array('i', xs)
+        self.fys = array('i', fys)
+        self.vys = array('i', vys)
+        for i in reversed(dropped):
+            del self.ys[i], self.xs[i], self.fys[i], self.vys[i], self.vts[i]
+
+    def copy(self):
+        return ParticleStore(self.ys, self.xs, self.fys, self.vys, self.vts)
+
+
+PARTICLE_KINDS = {}
+
+
+def register_particle_kind(cls):
+    """Class decorator that makes a particle kind available to `--effect`."""
+    PARTICLE_KINDS[cls.name] = cls()
+    return cls
+
+
+class ParticleKind:
+    """Spawn, advance, impact and render rules for one kind of falling particle.
+
+    Every rule works on the whole `ParticleStore` at once so that new effects
+    share the same per-frame cost as plain rain. The defaults describe rain.
+    Speeds are in cells per frame; on a sub-cell grid `spawn` and `advance` are told
+    how many dot `rows` and `cols` make a cell, so motion looks the same in either mode.
+    """
+
+    name = None
+    glyph = '|'
+    color = 'rain'  # Color role for falling particles; `Settings.pairs` maps it to a pair
+    start_speed = 0.5  # Rows per frame when spawned
+    gravity = 0.15  # Rows per frame added every frame
+    terminal_speed = (1.0, 2.0)  # Range each particle's top speed is drawn from
+    splash_glyphs = ('~', '.', '\'')
+    splash_color = 'splash'
+    splash_life = 0.5  # Seconds a splash stays on the ground
+    ground_glyphs = ('.', '_', '~', '=')  # Shallow to deep
+    ground_fill = 48  # Water level added per impact
+    ground_spread = 2  # Lateral flow as a shift (0 disables it)
+    ground_drain = 5  # Proportional drain as a shift
+
+    def spawn(self, store, width, intensity, rows=1):
+        """Adds new particles along the top cell, each with its own terminal speed.
+
+        On a sub-cell grid every one of the cell's `rows` dot rows gets its own spawn,
+        so particle density grows with the number of dots per cell.
+        """
+        rand = random.random
+        slowest, fastest = (int(speed * rows * FIXED_ONE) for speed in self.terminal_speed)
+        spread = fastest - slowest
+        start = int(self.start_speed * rows * FIXED_ONE)
+        for y in range(rows):
+            xs = [x for x in range(width) if rand() < intensity]
+            store.spawn_row(y, xs, start, [slowest + int(rand() * spread) for _ in xs])
+
+    def advance(self, store, height, width, wind, rows=1, cols=1):
+        """Accelerates and moves every particle and returns the columns that reached the ground."""
+        ground = height - 1
+        gravity = int(self.gravity * rows * FIXED_ONE)
+        vys = [w if (w := v + gravity) < t else t for v, t in zip(store.vys, store.vts)] if gravity else store.vys
+        fys = [f + v for f, v in zip(store.fys, vys)]
+        ys = [f >> FIXED_SHIFT for f in fys]
+        wind *= cols
+        xs = [(x + wind) % width for x in store.xs]
+        before = store.ys
+        dropped = [i for i, y in enumerate(ys) if y >= ground]
+        impacts = [xs[i] for i in dropped if before[i] < ground]
+        store.replace(ys, xs, fys, vys, dropped)
+        return impacts
+
+    def impact(self, splashes, xs, now):
+        """Records a splash for every column that was hit."""
+        splashes.update(dict.fromkeys(xs, now))
+
+    def render(self, stdscr, store, attr):
+        """Draws every particle with the given attribute."""
+        self._draw(stdscr, store, self.glyph, attr)
+
+    def erase(self, stdscr, store):
+        """Blanks the cells drawn for `store` on the previous frame."""
+        self._draw(stdscr, store, ' ', 0)
+
+    def render_splashes(self, stdscr, xs, attr):
+        """Draws a splash on the bottom row for every column in `xs`."""
+        glyphs = self.splash_glyphs
+        if not glyphs:
+            return
+        height, width = stdscr.getmaxyx()
+        for x in xs:
             if 0 <= x < width:
                 try:
-                    stdscr.addch(y + 1, x, random.choice(['~', '.', '\'']), curses.color_pair(2))
+                    stdscr.addch(height - 1, x, random.choice(glyphs), attr)
                 except curses.error:
                     pass
-        else:
-            # Move the raindrop down
-            if 0 <= y < height and 0 <= x < width:
-                stdscr.addch(y, x, ' ')
-            if 0 <= y + 1 < height and 0 <= x < width:
+
+    @staticmethod
+    def _draw(stdscr, store, glyph, attr):
+        addch = stdscr.addch
+        for y, x in store:
+            try:
+                addch(y, x, glyph, attr)
+            except curses.error:
+                pass
+
+
+@register_particle_kind
+class Rain(ParticleKind):
+    name = 'rain'
+
+
+@register_particle_kind
+class Hail(ParticleKind):
+    name = 'hail'
+    glyph = 'o'
+    color = 'lightning'
+    start_speed = 1.0
+    gravity = 0.3  # Heavy stones pick up speed quickly
+    terminal_speed = (2.0, 3.0)
+    splash_glyphs = ('*', '.', 'o')
+    splash_color = 'lightning'
+    splash_life = 0.3
+    ground_glyphs = ('.', 'o')
+    ground_fill = 32
+    ground_spread = 0  # Hailstones pile up where they land
+    ground_drain = 4
+
+    def spawn(self, store, width, intensity, rows=1):
+        """Hailstones are sparser than raindrops."""
+        super().spawn(store, width, intensity / 4, rows)
+
+
+@register_particle_kind
+class Snow(ParticleKind):
+    name = 'snow'
+    glyph = '*'
+    color = 'lightning'
+    splash_glyphs = ('.', '_', ',')
+    splash_color = 'lightning'
+    ground_glyphs = ('.', '_', '=', '#')
+    ground_fill = 64
+    ground_spread = 0  # Snow settles where it lands
+    ground_drain = 9  # And melts slowly
+
+    def spawn(self, store, width, intensity, rows=1):
+        """Flakes are sparser than raindrops."""
+        super().spawn(store, width, intensity / 3, rows)
+
+    def advance(self, store, height, width, wind, rows=1, cols=1):
+        """Flakes fall half a cell per frame on average and flutter sideways."""
+        ground = height - 1
+        rand = random.random
+        drift = (wind > 0) - (wind < 0)
+        ys = [y + int(rand() * (rows + 1)) for y in store.ys]
+        xs = [(x + (drift + (rand() < 0.25) - (rand() < 0.25)) * cols) % width for x in store.xs]
+        fys = [y << FIXED_SHIFT for y in ys]
+        before = store.ys
+        dropped = [i for i, y in enumerate(ys) if y >= ground]
+        impacts = [xs[i] for i in dropped if before[i] < ground]
+        store.replace(ys, xs, fys, store.vys, dropped)
+        return impacts
+
+
+@register_particle_kind
+class Matrix(ParticleKind):
+    name = 'matrix'
+    glyphs = '01abcdefghijklmnopqrstuvwxyz@#$%&*+=<>'
+    color = 'matrix'
+    start_speed = 1.0  # Code rain keeps a steady pace
+    gravity = 0.0
+    terminal_speed = (1.0, 1.0)
+    splash_glyphs = ()
+    splash_life = 0.0
+    ground_glyphs = ()
+    ground_fill = 0
+
+    def spawn(self, store, width, intensity, rows=1):
+        """Code rain spawns sparsely so the streams stay readable."""
+        super().spawn(store, width, intensity / 5, rows)
+
+    def advance(self, store, height, width, wind, rows=1, cols=1):
+        """Glyphs fall straight down regardless of wind."""
+        return super().advance(store, height, width, 0, rows, cols)
+
+    def impact(self, splashes, xs, now):
+        """Glyphs vanish on reaching the ground."""
+
+    def render(self, stdscr, store, attr):
+        """Draws a fresh random glyph for every particle."""
+        choice = random.choice
+        glyphs = self.glyphs
+        for y, x in store:
+            try:
+                stdscr.addch(y, x, choice(glyphs), attr)
+            except curses.error:
+                pass
+
+
+class Ground:
+    """Per-column water level on the bottom row that fills from impacts, spreads and drains.
+
+    Levels are fixed-point integers in a compact array, so a tick is a single
+    O(width) pass however many particles land, and only columns whose glyph
+    changed are redrawn.
+    """
+
+    SHIFT = 8  # Level units per glyph step
+
+    def __init__(self, width=0):
+        self.levels = array('l', [0]) * width
+        self.drawn = bytearray(width)  # Glyph index on screen per column
+        self.dry = True
+
+    def resize(self, width):
+        """Keeps the levels of surviving columns when the terminal is resized."""
+        levels = self.levels[:width]
+        self.levels = levels + array('l', [0]) * (width - len(levels))
+        self.invalidate()
+
+    def invalidate(self):
+        """Forces every column to be redrawn on the next update."""
+        self.drawn = bytearray(b'\xff') * len(self.levels)
+
+    def glyph(self, x, kind):
+        """Returns the glyph currently shown for column `x`."""
+        index = self.drawn[x] if x < len(self.drawn) else 0
+        return ((' ',) + kind.ground_glyphs)[index] if index != 0xff else ' '
+
+    def update(self, impacts, kind):
+        """Fills, spreads and drains the water and returns the columns that need redrawing."""
+        levels = self.levels
+        if impacts and kind.ground_fill:
+            fill = kind.ground_fill
+            for x in impacts:
+                levels[x] += fill
+            self.dry = False
+        if self.dry and 0xff not in self.drawn:
+            return []  # Nothing wet and nothing stale: the tick is free
+
+        top = len(kind.ground_glyphs)
+        cap = ((top + 1) << self.SHIFT) - 1
+        drain = kind.ground_drain
+        if kind.ground_spread and len(levels) > 1:
+            spread = kind.ground_spread
+            left = levels[:1] + levels[:-1]
+            right = levels[1:] + levels[-1:]
+            levels = [l + ((a + b - 2 * l) >> spread) for a, l, b in zip(left, levels, right)]
+        levels = array('l', [min(cap, l - (l >> drain) - 1) if l > 0 else 0 for l in levels])
+        self.levels = levels
+        self.dry = not any(levels)
+
+        shift = self.SHIFT
+        indices = bytearray([l >> shift for l in levels])
+        changed = [x for x, (new, old) in enumerate(zip(indices, self.drawn)) if new != old]
+        self.drawn = indices
+        return changed
+
+    def render(self, stdscr, xs, kind, splashes, attr):
+        """Draws the given columns, leaving live splashes on top."""
+        height, width = stdscr.getmaxyx()
+        glyphs = (' ',) + kind.ground_glyphs
+        drawn = self.drawn
+        for x in xs:
+            if x < width and x not in splashes and drawn[x] != 0xff:
                 try:
-                    stdscr.addch(y + 1, x, '|', curses.color_pair(1))  # Draw raindrop
+                    stdscr.addch(height - 1, x, glyphs[drawn[x]], attr)
                 except curses.error:
                     pass
-            new_raindrops.append((y + 1, x))  # Update the raindrop position
+
+
+class SubcellCanvas:
+    """Packs particles simulated on a grid of sub-cell dots into Braille or half-block glyphs.
+
+    Every character cell holds a `cols` x `rows` block of dots whose occupancy is
+    OR-ed as bits into a bytearray, so a frame is one pass over the particles and
+    only cells whose glyph changed since the previous frame are drawn.
+    """
+
+    MODES = {
+        # cols, rows, dot bit per (row, col), glyph per bit pattern
+        'braille': (2, 4, ((0x01, 0x08), (0x02, 0x10), (0x04, 0x20), (0x40, 0x80)),
+                    [' '] + [chr(0x2800 + bits) for bits in range(1, 256)]),
+        'halfblock': (1, 2, ((1,), (2,)), [' ', '\u2580', '\u2584', '\u2588']),
+    }
+
+    def __init__(self, mode):
+        self.mode = mode
+        self.cols, self.rows, bits, self.glyphs = self.MODES[mode]
+        self.col_shift = self.cols.bit_length() - 1
+        self.row_shift = self.rows.bit_length() - 1
+        # Flattened so a dot's bit is `dot_bits[(y % rows) << col_shift | x % cols]`
+        self.dot_bits = bytes(bit for row in bits for bit in row)
+        self.cells = None  # Bits on screen per cell; None forces a full redraw
+        self.lit = set()  # Indices of cells with any dot on screen
+
+    def grid_size(self, height, width):
+        """Returns the dot grid for a `height` x `width` area; the bottom row stays the ground."""
+        return (height - 1) * self.rows + 1, width * self.cols
+
+    def invalidate(self):
+        self.cells = None
+
+    def render(self, stdscr, store, attr):
+        """Draws the cells whose dot pattern changed since the previous call."""
+        height, width = stdscr.getmaxyx()
+        height -= 1
+        size = height * width
+        col_shift, row_shift = self.col_shift, self.row_shift
+        col_mask, row_mask = self.cols - 1, self.rows - 1
+        dot_bits = self.dot_bits
+
+        ys, xs = store.ys, store.xs
+        owners = [(y >> row_shift) * width + (x >> col_shift) for y, x in zip(ys, xs)]
+        dots = [dot_bits[(y & row_mask) << col_shift | (x & col_mask)] for y, x in zip(ys, xs)]
+        cells = bytearray(size)
+        for cell, dot in zip(owners, dots):
+            if cell < size:  # Particles from before a resize may fall outside
+                cells[cell] |= dot
+        lit = {cell for cell in set(owners) if cell < size}
+
+        previous = self.cells
+        if previous is None or len(previous) != size:
+            previous = bytearray(size)
+            changed = lit
+        else:
+            changed = [cell for cell in lit | self.lit if cells[cell] != previous[cell]]
+        glyphs = self.glyphs
+        for cell in changed:
+            try:
+                stdscr.addstr(cell // width, cell % width, glyphs[cells[cell]], attr)
+            except curses.error:
+                pass
+        self.cells = cells
+        self.lit = lit
+
+
+def simulate_frame(kind, particles, splashes, ground, height, width, intensity, wind, now, canvas=None):
+    """Spawns, advances and settles one frame of particles without drawing anything.
+
+    With a `canvas`, particles move on its sub-cell dot grid instead of whole cells, at
+    the same on-screen speed. Returns the columns that were hit, whose splash expired
+    and whose ground glyph changed.
+    """
+    grid_height, grid_width = canvas.grid_size(height, width) if canvas else (height, width)
+    rows, cols = (canvas.rows, canvas.cols) if canvas else (1, 1)
+    with PHASES('spawn'):
+        kind.spawn(particles, grid_width, intensity, rows)
+    with PHASES('advance'):
+        impacts = kind.advance(particles, grid_height, grid_width, wind, rows, cols)
+    if impacts:
+        if canvas:
+            impacts = [x >> canvas.col_shift for x in impacts]
+        kind.impact(splashes, impacts, now)
 
     # Fade out splashes
-    current_time = time.time()
-    for x, splash_time in list(splashes.items()):
-        if current_time - splash_time > 0.5:  # Splash lasts 0.5 seconds
-            splashes.pop(x)
+    with PHASES('splash expiry'):
+        expired = [x for x, splash_time in splashes.items() if now - splash_time > kind.splash_life]
+        for x in expired:
+            del splashes[x]
+
+    # Settle the puddles
+    changed = []
+    if ground is not None:
+        with PHASES('ground'):
+            if len(ground.levels) != width:
+                ground.resize(width)
+            changed = ground.update(impacts, kind)
+    return impacts, expired, changed
+
+
+def draw_frame(stdscr, kind, particles, splashes, ground, impacts, expired, changed, canvas=None, pairs=None):
+    """Draws the changes reported by `simulate_frame` once the previous particles are erased.
+
+    `pairs` maps the kind's color roles to color pairs, `DEFAULT_PAIRS` if not given.
+    """
+    height, width = stdscr.getmaxyx()
+    pairs = pairs or DEFAULT_PAIRS
+    attr = color_pair(pairs[kind.color])
+    splash_attr = color_pair(pairs[kind.splash_color])
+    with PHASES('render'):
+        for x in expired:
             if 0 <= x < width:
                 try:
-                    stdscr.addch(height - 1, x, ' ')  # Clear splash
+                    stdscr.addch(height - 1, x, ground.glyph(x, kind) if ground else ' ')  # Clear splash
                 except curses.error:
                     pass
+        kind.render_splashes(stdscr, [x for x in impacts if x in splashes], splash_attr)
+        if ground is not None:
+            ground.render(stdscr, changed, kind, splashes, splash_attr)  # Only columns whose level changed
+        if canvas:
+            canvas.render(stdscr, particles, attr)
+        else:
+            kind.render(stdscr, particles, attr)
 
-    return new_raindrops
 
+def generate_rain(stdscr, raindrops, splashes, intensity, wind, kind=None, ground=None):
+    """Updates particles of the given kind, draws them and creates and expires splashes.
 
-def lightning_flash_effect(stdscr, raindrops, splashes):
-    """Handles the lightning flash effect."""
+    `raindrops` may still be a list of (y, x) pairs as in earlier releases; the
+    returned `ParticleStore` is what to pass on the next call.
+    """
+    kind = kind or PARTICLE_KINDS['rain']
     height, width = stdscr.getmaxyx()
+    if not isinstance(raindrops, ParticleStore):
+        raindrops = ParticleStore(*zip(*raindrops)) if raindrops else ParticleStore()
+
+    # Blank last frame's positions, then spawn and advance as one batch
+    with PHASES('erase'):
+        kind.erase(stdscr, raindrops)
+    changes = simulate_frame(kind, raindrops, splashes, ground, height, width, intensity, wind, time.time())
+    draw_frame(stdscr, kind, raindrops, splashes, ground, *changes)
+    return raindrops
+
+
+def lightning_flash_effect(stdscr, raindrops, splashes, kind=None, flash=0.2, canvas=None, pairs=None):
+    """Handles the lightning flash effect."""
+    kind = kind or PARTICLE_KINDS['rain']
+    pairs = pairs or DEFAULT_PAIRS
+    bright = color_pair(pairs['lightning'])
 
     # Brighten the screen for the flash
     stdscr.clear()
-    for y, x in raindrops:
-        if 0 <= y < height and 0 <= x < width:
-            stdscr.addch(y, x, '|', curses.color_pair(3))  # Bright white raindrops
-    for x in splashes.keys():
-        if 0 <= x < width:
-            try:
-                stdscr.addch(height - 1, x, '~', curses.color_pair(3))  # Bright white splashes
-            except curses.error:
-                pass
+    if canvas:
+        canvas.invalidate()
+        canvas.render(stdscr, raindrops, bright)  # Bright white dots
+        canvas.invalidate()
+    else:
+        kind.render(stdscr, raindrops, bright)  # Bright white particles
+    kind.render_splashes(stdscr, splashes, bright)  # Bright white splashes
 
     stdscr.refresh()  # Force redraw for the lightning flash
-    time.sleep(0.2)  # Flash duration
+    time.sleep(flash)  # Flash duration
     stdscr.clear()
     stdscr.refresh()
+    kind.render_splashes(stdscr, splashes, color_pair(pairs[kind.splash_color]))  # Restore the ground
+
+
+DEFAULT_COLORS = {'rain': 'blue', 'splash': 'cyan', 'lightning': 'white', 'matrix': 'green'}
+
+
+@dataclass
+class Settings:
+    """Tunable parameters shared by the command line and embedding applications."""
+
+    intensity: float = 0.3
+    wind: int = 0
+    lightning: bool = False
+    dynamic: bool = False
+    randomness: float = 0.0
+    effect: str = 'rain'
+    fps: float = 10.0
+    hires: str = None  # 'braille' or 'halfblock' to simulate on sub-cell dots
+    colors: dict = field(default_factory=lambda: dict(DEFAULT_COLORS))
+    pairs: dict = field(default_factory=lambda: dict(DEFAULT_PAIRS))  # Color pair used for each color role
+
+
+class RainSimulation:
+    """Rain that can be embedded in any curses application.
+
+    `step(dt)` advances the simulation at `settings.fps`, and `render_into(window, rect)`
+    draws whatever changed since the previous call into a region of an existing window.
+    Nothing here touches global curses state, and both calls are free when nothing is due.
+    Colors are drawn with the pairs the host assigns to each role in `settings.pairs`.
+    When lightning strikes, `flash` is set for that tick and the host decides how to show it.
+    """
+
+    max_catch_up = 3  # Most ticks one `step` runs to catch up
+
+    def __init__(self, settings=None, height=24, width=80):
+        self.settings = settings or Settings()
+        self.height = height
+        self.width = width
+        self.particles = ParticleStore()
+        self.splashes = {}
+        self.ground = Ground(width)
+        self.clock = 0.0  # Simulated seconds, used to age splashes
+        self.flash = False
+        self.canvas = None
+        self._cycle_time = 0.0
+        self._lag = 0.0
+        self._drawn = ParticleStore()  # Particles currently on screen
+        self._impacts = []
+        self._expired = []
+        self._changed = set()
+        self._dirty = True
+        self._full_redraw = True
+        self._view = None
+        self._view_key = None
+
+    @property
+    def kind(self):
+        return PARTICLE_KINDS[self.settings.effect]
+
+    def step(self, dt):
+        """Advances by `dt` seconds and returns how many fixed-rate ticks that took.
+
+        At most `max_catch_up` ticks run per call and any older backlog is dropped, so
+        a host that stops stepping while hidden resumes at once instead of replaying it.
+        """
+        interval = 1 / self.settings.fps
+        self._lag = min(self._lag + dt, self.max_catch_up * interval)
+        ticks = 0
+        while self._lag >= interval:
+            self._lag -= interval
+            self.tick()
+            ticks += 1
+        return ticks
 
+    def tick(self):
+        """Advances the simulation by exactly one frame."""
+        settings = self.settings
+        self.clock += 1 / settings.fps
+        if (self.canvas.mode if self.canvas else None) != settings.hires:
+            self._switch_canvas(settings.hires)
+        if settings.dynamic:
+            self._drift_weather()
+        self.flash = settings.lightning and random.random() < (0.02 if settings.intensity > 0.7 else 0.005)
 
-def display_settings(stdscr, intensity, wind, lightning):
+        impacts, expired, changed = simulate_frame(
+            self.kind, self.particles, self.splashes, self.ground, self.height, self.width,
+            settings.intensity, settings.wind, self.clock, self.canvas
+        )
+        self._impacts.extend(impacts)
+        self._expired.extend(expired)
+        self._changed.update(changed)
+        self._dirty = True
+
+    def _drift_weather(self):
+        """Dynamic Mode Adjustments."""
+        settings = self.settings
+        randomness = settings.randomness
+        self._cycle_time += 0.05  # Slower changes
+        settings.intensity = max(0.1, min(1.0, 0.5 + 0.2 * math.sin(self._cycle_time) +
+                                          random.uniform(-randomness / 2, randomness / 2)))
+        settings.wind = max(-5, min(5, int(2 * math.sin(self._cycle_time / 3) +
+                                           random.uniform(-randomness * 5, randomness * 5))))
+
+    def _switch_canvas(self, mode):
+        """Moves between whole cells and a sub-cell grid, rescaling the particles in flight to keep their speed."""
+        old_cols, old_rows = (self.canvas.cols, self.canvas.rows) if self.canvas else (1, 1)
+        self.canvas = SubcellCanvas(mode) if mode else None
+        new_cols, new_rows = (self.canvas.cols, self.canvas.rows) if self.canvas else (1, 1)
+        particles = self.particles
+        fys = [f * new_rows // old_rows for f in particles.fys]
+        self.particles = ParticleStore(
+            [f >> FIXED_SHIFT for f in fys], [x * new_cols // old_cols for x in particles.xs], fys,
+            [v * new_rows // old_rows for v in particles.vys], [v * new_rows // old_rows for v in particles.vts]
+        )
+        self.invalidate()
+
+    def resize(self, height, width):
+        """Adapts the simulation to a new drawing area."""
+        self.height = height
+        self.width = width
+        self.ground.resize(width)
+        self.invalidate()
+
+    def invalidate(self):
+        """Makes the next `render_into` repaint the whole area."""
+        self._full_redraw = True
+        self._dirty = True
+
+    def render_into(self, window, rect=None):
+        """Draws changes into `rect` = (y, x, height, width) of `window`, or all of it; False if nothing was due."""
+        if not self._dirty:
+            return False
+        view = self._view_for(window, rect)
+        height, width = view.getmaxyx()
+        if (height, width) != (self.height, self.width):
+            self.resize(height, width)
+
+        kind = self.kind
+        canvas = self.canvas
+        if self._full_redraw:
+            view.erase()
+            self._changed.update(range(width))
+            kind.render_splashes(view, self.splashes, color_pair(self.settings.pairs[kind.splash_color]))
+            if canvas:
+                canvas.invalidate()
+        elif not canvas:  # The canvas diffs its own cells
+            with PHASES('erase'):
+                kind.erase(view, self._drawn)
+        draw_frame(view, kind, self.particles, self.splashes, self.ground,
+                   self._impacts, self._expired, sorted(self._changed), canvas, self.settings.pairs)
+
+        self._drawn = self.particles.copy()
+        self._impacts = []
+        self._expired = []
+        self._changed = set()
+        self._dirty = self._full_redraw = False
+        return True
+
+    def _view_for(self, window, rect):
+        if rect is None:
+            return window
+        key = (id(window), tuple(rect))
+        if key != self._view_key:
+            y, x, height, width = rect
+            self._view = window.derwin(height, width, y, x)
+            self._view_key = key
+            self._full_redraw = True
+        return self._view
+
+
+FOCUS_IN = -2  # Pseudo key codes for the terminal's focus reports
+FOCUS_OUT = -3
+
+
+def read_keys(stdscr):
+    """Drains pending input, translating focus-report sequences into FOCUS_IN and FOCUS_OUT."""
+    keys = []
+    while True:
+        key = stdscr.getch()
+        if key == -1:
+            return keys
+        if key == 27:  # ESC [ I and ESC [ O report focus changes
+            following = stdscr.getch()
+            final = stdscr.getch() if following == ord('[') else -1
+            if final == ord('I'):
+                keys.append(FOCUS_IN)
+                continue
+            if final == ord('O'):
+                keys.append(FOCUS_OUT)
+                continue
+            keys.extend(k for k in (key, following, final) if k != -1)
+            continue
+        keys.append(key)
+
+
+@contextlib.contextmanager
+def focus_reporting(stream):
+    """Asks the terminal to report focus changes for the duration of the block."""
+    stream.write('\x1b[?1004h')
+    stream.flush()
+    try:
+        yield
+    finally:
+        stream.write('\x1b[?1004l')
+        stream.flush()
+
+
+def wait_for_input(timeout):
+    """Sleeps until `timeout` seconds pass or input arrives, whichever is first; None waits for input."""
+    start = time.monotonic()
+    try:
+        select.select([sys.stdin], [], [], timeout)
+    except (OSError, ValueError):  # stdin is not selectable
+        time.sleep(1.0 if timeout is None else timeout)
+    return time.monotonic() - start
+
+
+class PowerSaver:
+    """Drops to a low tick rate while the terminal is unfocused or idle, and accounts for the CPU saved."""
+
+    def __init__(self, frame_delay, idle_delay=1.0, idle_timeout=None):
+        self.frame_delay = frame_delay
+        self.idle_delay = idle_delay  # None suspends until input arrives
+        self.idle_timeout = idle_timeout
+        self.focused = True
+        self.last_input = time.monotonic()
+        self.active_frames = 0
+        self.active_cpu = 0.0
+        self.idle_frames = 0
+        self.idle_seconds = 0.0
+
+    @property
+    def idle(self):
+        if not self.focused:
+            return True
+        return self.idle_timeout is not None and time.monotonic() - self.last_input >= self.idle_timeout
+
+    def on_key(self, key):
+        """Updates focus and activity from one key returned by `read_keys`."""
+        self.focused = key != FOCUS_OUT
+        if key != FOCUS_OUT:
+            self.last_input = time.monotonic()
+
+    def pause(self, frame_cpu, frame_wall, limit=None):
+        """Waits until the next tick, at most `limit` seconds, and records how the frame was spent."""
+        if not self.idle:
+            self.active_frames += 1
+            self.active_cpu += frame_cpu
+            time.sleep(self.frame_delay)
+            return
+        delay = self.idle_delay
+        if limit is not None:
+            delay = max(0.0, limit if delay is None else min(delay, limit))
+        self.idle_frames += 1
+        self.idle_seconds += frame_wall + wait_for_input(delay)
+
+    @property
+    def saved_cpu(self):
+        """Estimated CPU seconds saved compared to running at the full tick rate throughout."""
+        if not self.active_frames or not self.frame_delay:
+            return 0.0
+        skipped = self.idle_seconds / self.frame_delay - self.idle_frames
+        return max(0.0, skipped) * self.active_cpu / self.active_frames
+
+
+def display_settings(stdscr, intensity, wind, lightning, power=None, notice=None):
     """Displays the current settings."""
     height, width = stdscr.getmaxyx()
-    settings = f"Intensity: {intensity:.2f}  Wind: {wind:+d}  Lightning: {'ON' if lightning else 'OFF'}"
+    settings = f"Intensity: {intensity:.2f}  Wind: {wind:+3d}  Lightning: {'ON' if lightning else 'OFF':3}"
+    if power is not None and power.idle_frames:
+        settings += f"  Idle saved: {power.saved_cpu:.2f}s CPU"
+    if notice:
+        settings += f"  {notice}"
     stdscr.addstr(height - 1, 0, settings[:width - 1])  # Truncate if too long
 
 
-def main(stdscr, intensity, duration, wind, lightning, dynamic, randomness):
-    """Main function to run the rain simulation with dynamic changes and interactive controls."""
-    curses.curs_set(0)  # Hide the cursor
+def default_config_path():
+    """Returns the config file to use: an existing config.toml or config.ini, preferring TOML."""
+    directory = os.path.join(os.environ.get('XDG_CONFIG_HOME') or os.path.expanduser('~/.config'), 'raintty')
+    toml_path = os.path.join(directory, 'config.toml')
+    ini_path = os.path.join(directory, 'config.ini')
+    if os.path.exists(ini_path) and not (tomllib and os.path.exists(toml_path)):
+        return ini_path
+    return toml_path if tomllib else ini_path
+
+
+_ON = ('yes', 'true', 'on')
+_OFF = ('no', 'false', 'off', 'none')
+
+
+def _flag(value):
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.lower() in ('1',) + _ON:
+        return True
+    if isinstance(value, str) and value.lower() in ('0',) + _OFF:
+        return False
+    raise ValueError(f"expected on or off, got '{value}'")
+
+
+def _in_range(convert, low, high):
+    """Parses a number of type `convert`, rejecting booleans and fractions where a whole number is expected."""
+    def parse(value):
+        try:
+            if isinstance(value, bool):
+                raise ValueError
+            number = convert(value)
+            if not isinstance(value, str) and number != value:
+                raise ValueError  # 2.7 would silently become 2
+        except (TypeError, ValueError):
+            raise ValueError(f"expected {'a whole number' if convert is int else 'a number'}, got '{value}'") from None
+        if not (low <= number <= high):
+            raise ValueError(f"must be between {low} and {high}")
+        return number
+    return parse
+
+
+def _one_of(choices):
+    def parse(value):
+        if value not in choices:
+            raise ValueError(f"must be one of {', '.join(sorted(choices))}")
+        return value
+    return parse
+
+
+def _dynamic(value):
+    """`dynamic` is off, on (randomness 0.2) or, given any number, the randomness itself."""
+    if isinstance(value, bool) or (isinstance(value, str) and value.lower() in _ON + _OFF):
+        return {'dynamic': True, 'randomness': 0.2} if _flag(value) else {'dynamic': False}
+    return {'dynamic': True, 'randomness': _in_range(float, 0.0, 1.0)(value)}
+
+
+def _hires(value):
+    if value is False or (isinstance(value, str) and value.lower() in ('off', 'none', 'cell')):
+        return None
+    return _one_of(SubcellCanvas.MODES)(value)
+
+
+CONFIG_KEYS = {
+    'intensity': _in_range(float, 0.1, 1.0),
+    'wind': _in_range(int, -10, 10),
+    'lightning': _flag,
+    'dynamic': _dynamic,
+    'effect': _one_of(PARTICLE_KINDS),
+    'fps': _in_range(float, 1, 60),
+    'hires': _hires,
+}
+COLOR_NAMES = ('black', 'red', 'green', 'yellow', 'blue', 'magenta', 'cyan', 'white')
+
+
+def load_config(path):
+    """Reads a TOML or INI config file into a dict of `Settings` fields, raising ValueError if it is invalid.
+
+    INI files keep their settings in a `[raintty]` section; both formats take a `[colors]` table.
+    """
+    try:
+        if path.endswith('.toml'):
+            if tomllib is None:
+                raise ValueError("TOML config needs Python 3.11 or newer; use config.ini")
+            with open(path, 'rb') as config_file:
+                data = tomllib.load(config_file)
+            colors = data.pop('colors', {})
+        else:
+            parser = configparser.ConfigParser()
+            with open(path) as config_file:
+                parser.read_file(config_file)
+            data = dict(parser['raintty']) if parser.has_section('raintty') else {}
+            colors = dict(parser['colors']) if parser.has_section('colors') else {}
+    except (OSError, ValueError, configparser.Error) as error:  # ValueError covers TOMLDecodeError
+        raise ValueError(str(error)) from error
+
+    values = {}
+    for key, value in data.items():
+        if key not in CONFIG_KEYS:
+            raise ValueError(f"unknown setting '{key}'")
+        try:
+            parsed = CONFIG_KEYS[key](value)
+        except (TypeError, ValueError) as error:
+            raise ValueError(f"{key}: {error}") from error
+        values.update(parsed if isinstance(parsed, dict) else {key: parsed})
+    if not isinstance(colors, dict):
+        raise ValueError("colors must be a table of role = color name")
+    if colors:
+        unknown = set(colors) - set(DEFAULT_COLORS)
+        if unknown:
+            raise ValueError(f"unknown color '{unknown.pop()}'")
+        bad = [name for name in colors.values() if str(name).lower() not in COLOR_NAMES]
+        if bad:
+            raise ValueError(f"colors: '{bad[0]}' must be one of {', '.join(COLOR_NAMES)}")
+        values['colors'] = dict(DEFAULT_COLORS, **{key: name.lower() for key, name in colors.items()})
+    return values
+
+
+class ConfigWatcher:
+    """Polls a config file's modification time and reports the settings that changed in it.
+
+    Checking costs one `stat` every `interval` seconds. Only values that differ from the
+    previous load are reported, so command-line overrides stand until the file changes them.
+    A setting removed from the file reverts to its value in `fallback`, the startup value
+    without the file. A broken file keeps the last good values and leaves the reason in `error`.
+    """
+
+    def __init__(self, path, interval=1.0, fallback=None):
+        self.path = path
+        self.interval = interval
+        self.fallback = fallback or {}
+        self.values = {}
+        self.error = None
+        self._mtime = None
+        self._next_check = 0.0
+
+    def _stat(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def load(self):
+        """Reads the file now and returns all of its values."""
+        self._mtime = self._stat()
+        self.values = load_config(self.path) if self._mtime is not None else {}
+        return self.values
+
+    def poll(self, now):
+        """Returns the settings that changed since the last load, or an empty dict if nothing is due."""
+        if now < self._next_check:
+            return {}
+        self._next_check = now + self.interval
+        mtime = self._stat()
+        if mtime == self._mtime:
+            return {}
+        self._mtime = mtime
+        try:
+            values = load_config(self.path) if mtime is not None else {}
+        except ValueError as error:
+            self.error = f"Config: {error}"
+            return {}
+        self.error = None
+        changed = {key: value for key, value in values.items() if self.values.get(key) != value}
+        removed = self.values.keys() - values.keys()
+        changed.update({key: self.fallback[key] for key in removed if key in self.fallback})
+        self.values = values
+        return changed
+
+
+def init_colors(colors, pairs=DEFAULT_PAIRS):
+    """Sets up the color pairs; calling it again recolors what is already on screen."""
+    for role, number in pairs.items():
+        curses.init_pair(number, getattr(curses, f"COLOR_{colors[role].upper()}"), curses.COLOR_BLACK)
+
+
+def main(stdscr, settings, duration=None, frames=None, idle_timeout=None, idle_fps=1.0, config=None):
+    """Main function to run the rain simulation with dynamic changes and interactive controls.
+
+    Returns the number of frames that were drawn.
+    """
+    headless = isinstance(stdscr, HeadlessScreen)
     stdscr.nodelay(1)  # Make getch non-blocking
-    curses.start_color()
-    curses.init_pair(1, curses.COLOR_BLUE, curses.COLOR_BLACK)  # Rain color
-    curses.init_pair(2, curses.COLOR_CYAN, curses.COLOR_BLACK)  # Splash color
-    curses.init_pair(3, curses.COLOR_WHITE, curses.COLOR_BLACK)  # Lightning color
+    if not headless:
+        curses.curs_set(0)  # Hide the cursor
+        curses.start_color()
+        init_colors(settings.colors, settings.pairs)
+    frame_delay = 0 if headless else 1 / settings.fps  # Headless runs go flat out
+    power = PowerSaver(frame_delay, 1 / idle_fps if idle_fps else None, idle_timeout)
 
-    raindrops = []
-    splashes = {}
+    simulation = RainSimulation(settings, *stdscr.getmaxyx())
     start_time = time.time()
-    cycle_time = 0
     show_hud = True
+    running = True
+    stdscr.clear()
 
-    while True:
-        if duration is not None and time.time() - start_time >= duration:
-            break
+    frame = 0
+    with focus_reporting(sys.stdout) if not headless else contextlib.nullcontext():
+        while running:
+            if duration is not None and time.time() - start_time >= duration:
+                break
+            if frames is not None and frame >= frames:
+                break
+            frame_start = time.monotonic()
+            frame_cpu = time.process_time()
 
-        # Dynamic Mode Adjustments
-        if dynamic:
-            cycle_time += 0.05  # Slower changes
-            intensity = max(0.1, min(1.0, 0.5 + 0.2 * math.sin(cycle_time) +
-                                     random.uniform(-randomness / 2, randomness / 2)))
-            wind = max(-5, min(5, int(2 * math.sin(cycle_time / 3) +
-                                      random.uniform(-randomness * 5, randomness * 5))))
+            # Apply config file edits live, keeping the particles in flight
+            config_error = config.error if config else None
+            changes = config.poll(frame_start) if config else {}
+            if changes:
+                for key, value in changes.items():
+                    setattr(settings, key, value)
+                if 'colors' in changes and not headless:
+                    init_colors(settings.colors, settings.pairs)
+                power.frame_delay = 0 if headless else 1 / settings.fps
+            if changes or (config and config.error != config_error):
+                simulation.invalidate()  # Also clears a stale config notice from the HUD
 
-        # Lightning Effect
-        lightning_flash = lightning and random.random() < (0.02 if intensity > 0.7 else 0.005)
+            # Handle keypresses and focus reports for interactive controls
+            with PHASES('input'):
+                keys = read_keys(stdscr)
+            for key in keys:
+                power.on_key(key)
+                if key == ord('q'):
+                    running = False
+                elif key == ord('+'):
+                    settings.intensity = min(1.0, settings.intensity + 0.1)
+                elif key == ord('-'):
+                    settings.intensity = max(0.1, settings.intensity - 0.1)
+                elif key == ord('['):
+                    settings.wind = max(-10, settings.wind - 1)
+                elif key == ord(']'):
+                    settings.wind = min(10, settings.wind + 1)
+                elif key == ord('l'):
+                    settings.lightning = not settings.lightning
+                elif key == ord('h'):
+                    show_hud = not show_hud
+                    simulation.invalidate()  # Restore the ground beneath the HUD
+                elif key == curses.KEY_RESIZE:
+                    stdscr.clear()  # Only a resize needs a full repaint
+                    simulation.invalidate()
+            if not running:
+                break
 
-        # Handle keypress for interactive controls
-        key = stdscr.getch()
-        if key == ord('q'):
-            break
-        elif key == ord('+'):
-            intensity = min(1.0, intensity + 0.1)
-        elif key == ord('-'):
-            intensity = max(0.1, intensity - 0.1)
-        elif key == ord('['):
-            wind = max(-10, wind - 1)
-        elif key == ord(']'):
-            wind = min(10, wind + 1)
-        elif key == ord('l'):
-            lightning = not lightning
-        elif key == ord('h'):
-            show_hud = not show_hud
-
-        stdscr.clear()
-
-        # Generate and draw raindrops
-        raindrops = generate_rain(stdscr, raindrops, splashes, intensity, wind)
-
-        # Lightning flash
-        if lightning_flash:
-            lightning_flash_effect(stdscr, raindrops, splashes)
-
-        # Display settings if HUD is enabled
-        if show_hud:
-            display_settings(stdscr, intensity, wind, lightning)
-
-        stdscr.refresh()
-        time.sleep(0.1)  # Frame rate control
+            # Advance one frame and draw only the cells that changed
+            simulation.tick()
+            simulation.render_into(stdscr)
+            frame += 1
+
+            # Lightning flash
+            if simulation.flash:
+                with PHASES('lightning'):
+                    lightning_flash_effect(stdscr, simulation.particles, simulation.splashes, simulation.kind,
+                                           0 if headless else 0.2, simulation.canvas, settings.pairs)
+                    simulation.invalidate()
+
+            # Display settings if HUD is enabled
+            if show_hud:
+                with PHASES('hud'):
+                    display_settings(stdscr, settings.intensity, settings.wind, settings.lightning, power,
+                                     config.error if config else None)
+
+            with PHASES('refresh'):
+                stdscr.refresh()
+
+            # Frame rate control; idle frames sleep longer and wake early on input or focus
+            remaining = None if duration is None else duration - (time.time() - start_time)
+            power.pause(time.process_time() - frame_cpu, time.monotonic() - frame_start, remaining)
+    PHASES.capture()  # While the simulation is still alive
+    return frame
+
+
+def run_profiled(run, output, top=15):
+    """Runs `run()` under cProfile and tracemalloc, writing `<output>.pstats` and a `<output>.txt` summary.
+
+    `run` returns the number of frames it drew, which heads the summary. The top
+    allocations come from the snapshot `main` captures as its frame loop ends, so
+    they show what the live simulation holds rather than what is left afterwards.
+    """
+    PHASES.totals.clear()
+    PHASES.snapshot = None
+    PHASES.enabled = True
+    tracemalloc.start()
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        frames = run()
+    finally:
+        profiler.disable()
+        snapshot = PHASES.snapshot or tracemalloc.take_snapshot()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        PHASES.enabled = False
+
+    profiler.dump_stats(f"{output}.pstats")
+    functions = io.StringIO()
+    pstats.Stats(profiler, stream=functions).sort_stats('cumulative').print_stats(top)
+    allocations = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)]).statistics('lineno')
+
+    with open(f"{output}.txt", 'w') as summary:
+        summary.write(f"raintty profile of {frames} frames\n\n")
+        summary.write(PHASES.report() + "\n\n")
+        summary.write(f"Peak traced memory: {peak / 1024:.1f} KiB\n")
+        summary.write(f"Top {top} allocations at the last frame:\n")
+        for stat in allocations[:top]:
+            summary.write(f"  {stat}\n")
+        summary.write("\n" + functions.getvalue())
+    return f"{output}.pstats", f"{output}.txt"
+
+
+def settings_from_args(args):
+    """Builds `Settings` from parsed command-line arguments."""
+    return Settings(
+        intensity=args.intensity, wind=args.wind, lightning=args.lightning, dynamic=args.dynamic is not None,
+        randomness=args.dynamic or 0.0, effect=args.effect, hires=None if args.hires == 'off' else args.hires
+    )
 
 
 if __name__ == "__main__":
@@ -157,10 +1202,61 @@ if __name__ == "__main__":
     parser.add_argument("-d", "--duration", type=float, default=None, help="Simulation duration in seconds.")
     parser.add_argument("-w", "--wind", type=int, default=0, help="Initial wind intensity.")
     parser.add_argument("-l", "--lightning", action="store_true", help="Enable lightning flashes.")
+    parser.add_argument(
+        "--no-lightning", dest="lightning", action="store_false", help="Disable lightning set in the config file."
+    )
     parser.add_argument(
         "--dynamic", nargs='?', const=0.2, type=float,
         help="Enable dynamic weather transitions with optional randomness (default: 0.2)."
     )
+    parser.add_argument(
+        "--no-dynamic", dest="dynamic", action="store_const", const=None,
+        help="Disable dynamic weather set in the config file."
+    )
+    parser.add_argument(
+        "-e", "--effect", choices=sorted(PARTICLE_KINDS), default='rain',
+        help="Particle effect to simulate (default: rain)."
+    )
+    parser.add_argument(
+        "--hires", nargs='?', const='braille', choices=sorted(SubcellCanvas.MODES) + ['off'],
+        help="Simulate on sub-cell dots drawn as braille (default) or halfblock glyphs, or off."
+    )
+    parser.add_argument(
+        "--profile", type=int, metavar="FRAMES",
+        help="Run FRAMES frames under cProfile and tracemalloc and write a report."
+    )
+    parser.add_argument(
+        "--profile-output", default="raintty-profile",
+        help="Path prefix for the .pstats and .txt profile files (default: raintty-profile)."
+    )
+    parser.add_argument("--headless", action="store_true", help="Profile without drawing to the terminal.")
+    parser.add_argument(
+        "--idle-timeout", type=float, metavar="SECONDS",
+        help="Enter low-power mode after SECONDS without input (focus loss always does)."
+    )
+    parser.add_argument(
+        "--idle-fps", type=float, default=1.0,
+        help="Frame rate in low-power mode; 0 suspends until input or focus returns (default: 1)."
+    )
+    parser.add_argument(
+        "-c", "--config", default=default_config_path(),
+        help="Settings file, reloaded live when it changes (default: ~/.config/raintty/config.toml or .ini)."
+    )
+    parser.add_argument("--no-config", action="store_true", help="Ignore the settings file.")
+
+    # Settings from the config file become the defaults, so explicit flags still win
+    config_args = parser.parse_known_args()[0]
+    config = None if config_args.no_config else ConfigWatcher(config_args.config)
+    try:
+        file_settings = config.load() if config else {}
+    except ValueError as error:
+        print(f"Error: {config_args.config}: {error}")
+        exit(1)
+    startup_args = parser.parse_args()  # Without the file: what a setting removed from it reverts to
+    flags = ('intensity', 'wind', 'lightning', 'effect', 'hires')
+    parser.set_defaults(**{key: value for key, value in file_settings.items() if key in flags})
+    if 'dynamic' in file_settings:
+        parser.set_defaults(dynamic=file_settings.get('randomness') if file_settings['dynamic'] else None)
     args = parser.parse_args()
 
     if not (0.1 <= args.intensity <= 1.0):
@@ -169,8 +1265,36 @@ if __name__ == "__main__":
     if args.dynamic is not None and not (0.0 <= args.dynamic <= 1.0):
         print("Error: Randomness must be between 0.0 and 1.0.")
         exit(1)
+    if args.profile is not None and args.profile < 1:
+        print("Error: Profile frame count must be at least 1.")
+        exit(1)
+    if args.headless and args.profile is None:
+        print("Error: --headless requires --profile.")
+        exit(1)
+    if args.idle_fps < 0 or (args.idle_timeout is not None and args.idle_timeout <= 0):
+        print("Error: Idle frame rate cannot be negative and idle timeout must be positive.")
+        exit(1)
 
-    curses.wrapper(
-        main, args.intensity, args.duration, args.wind, args.lightning, args.dynamic is not None, args.dynamic or 0.0
+    locale.setlocale(locale.LC_ALL, '')  # Needed for braille and block glyphs
+    os.environ.setdefault('ESCDELAY', '25')  # Don't stall on the ESC that starts a focus report
+    settings = settings_from_args(args)
+    if 'fps' in file_settings:
+        settings.fps = file_settings['fps']
+    if 'colors' in file_settings:
+        settings.colors = file_settings['colors']
+    if config:
+        config.fallback = vars(settings_from_args(startup_args))
+    options = dict(
+        duration=args.duration, frames=args.profile, idle_timeout=args.idle_timeout, idle_fps=args.idle_fps,
+        config=config
     )
-
+    if args.profile is None:
+        curses.wrapper(main, settings, **options)
+    else:
+        if args.headless:
+            columns, lines = shutil.get_terminal_size()
+            run = lambda: main(HeadlessScreen(lines, columns), settings, **options)
+        else:
+            run = lambda: curses.wrapper(main, settings, **options)
+        for path in run_profiled(run, args.profile_output):
+            print(f"Wrote {path}")